@@ -5,19 +5,50 @@ Claude Code 交互分析脚本
 """
 
 import json
-import pandas as pd
-from openpyxl import load_workbook
+import re
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
 
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退到标准库 json
+    orjson = None
 
-def extract_user_text(message):
-    """从 message 中提取 user 的纯文本内容"""
+
+def json_loads(data):
+    """解析 JSON（str 或 bytes），优先使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj):
+    """序列化为 JSON 字符串（保留非 ASCII 字符），优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    # 与 orjson 输出保持一致：紧凑分隔符
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def extract_message_info(message):
+    """一次遍历 message，返回 (主要角色, user 的纯文本内容)
+
+    角色优先返回 assistant（因为包含 tool_use），否则返回 user
+    """
     if not message or not isinstance(message, list):
-        return ""
+        return "", ""
 
+    assistant_seen = False
+    user_seen = False
     user_texts = []
     for msg in message:
-        if msg.get("role") == "user":
+        role = msg.get("role")
+        if role == "assistant":
+            assistant_seen = True
+        elif role == "user":
+            user_seen = True
             content = msg.get("content", "")
             if isinstance(content, str):
                 user_texts.append(content)
@@ -28,25 +59,14 @@ def extract_user_text(message):
                     elif isinstance(item, str):
                         user_texts.append(item)
 
-    return "\n".join(user_texts)
-
+    if assistant_seen:
+        role = "assistant"
+    elif user_seen:
+        role = "user"
+    else:
+        role = ""
 
-def determine_role(message):
-    """确定 message 中的主要角色"""
-    if not message or not isinstance(message, list):
-        return ""
-
-    # 优先返回 assistant（因为包含 tool_use）
-    for msg in message:
-        if msg.get("role") == "assistant":
-            return "assistant"
-
-    # 否则返回 user
-    for msg in message:
-        if msg.get("role") == "user":
-            return "user"
-
-    return ""
+    return role, "\n".join(user_texts)
 
 
 def extract_tool_info(tool_use):
@@ -71,9 +91,23 @@ def extract_tool_info(tool_use):
     return tool_count, ", ".join(tool_names) if tool_names else ""
 
 
+CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+COLUMNS = ["step", "turn_index", "role", "user_text", "assistant_text",
+           "thinking", "tool_count", "tool_names", "raw_tool_json"]
+
+
 def process_data(data):
-    """处理数据并生成表格行"""
-    rows = []
+    """处理数据并生成按列组织的表格数据（列名 -> 值列表）"""
+    step_col = []
+    turn_col = []
+    role_col = []
+    user_text_col = []
+    assistant_text_col = []
+    thinking_col = []
+    tool_count_col = []
+    tool_names_col = []
+    raw_tool_json_col = []
 
     for step_name, interactions in data.items():
         for turn_index, interaction in enumerate(interactions):
@@ -82,105 +116,109 @@ def process_data(data):
             text = interaction.get("text", "")
             tool_use = interaction.get("tool_use", [])
 
-            role = determine_role(message)
-            user_text = extract_user_text(message)
+            role, user_text = extract_message_info(message)
             tool_count, tool_names = extract_tool_info(tool_use)
-            raw_tool_json = json.dumps(tool_use, ensure_ascii=False) if tool_use else ""
-
-            row = {
-                "step": step_name,
-                "turn_index": turn_index,
-                "role": role,
-                "user_text": user_text,
-                "assistant_text": text,
-                "thinking": thinking,
-                "tool_count": tool_count,
-                "tool_names": tool_names,
-                "raw_tool_json": raw_tool_json
-            }
-            rows.append(row)
-
-    return rows
-
-
-def save_to_excel(df, filename):
-    """保存到 Excel 文件，并设置格式"""
-    df.to_excel(filename, index=False, engine='openpyxl')
-
-    # 加载工作簿设置格式
-    wb = load_workbook(filename)
-    ws = wb.active
+            raw_tool_json = json_dumps(tool_use) if tool_use else ""
+
+            # 缺失值在源头统一为空字符串，无需再 fillna
+            step_col.append(step_name)
+            turn_col.append(turn_index)
+            role_col.append(role)
+            user_text_col.append(user_text)
+            assistant_text_col.append("" if text is None else text)
+            thinking_col.append("" if thinking is None else thinking)
+            tool_count_col.append(tool_count)
+            tool_names_col.append(tool_names)
+            raw_tool_json_col.append(raw_tool_json)
+
+    return {
+        "step": step_col,
+        "turn_index": turn_col,
+        "role": role_col,
+        "user_text": user_text_col,
+        "assistant_text": assistant_text_col,
+        "thinking": thinking_col,
+        "tool_count": tool_count_col,
+        "tool_names": tool_names_col,
+        "raw_tool_json": raw_tool_json_col
+    }
+
+
+def iter_rows(cols):
+    """按 COLUMNS 顺序逐行返回 process_data 生成的列数据"""
+    return zip(*(cols[c] for c in COLUMNS))
+
+
+def display_width(value):
+    """计算显示宽度，中文字符算2个宽度"""
+    text = str(value)
+    return len(text) + len(CJK_PATTERN.findall(text))
+
+
+def save_to_excel(cols, filename):
+    """以 write-only 模式流式保存到 Excel 文件，并设置格式"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+
+    # 自动设置列宽（表头也参与计算）；write-only 模式下列宽需在写入行之前设置
+    for i, col in enumerate(COLUMNS):
+        max_length = max([display_width(col)] + [display_width(v) for v in cols[col]])
+        # 设置列宽，最大50
+        ws.column_dimensions[get_column_letter(i + 1)].width = min(max_length + 2, 50)
 
     # 首行加粗
-    for cell in ws[1]:
+    header = []
+    for col in COLUMNS:
+        cell = WriteOnlyCell(ws, value=col)
         cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
 
-    # 自动设置列宽
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if cell.value:
-                    # 计算字符长度，中文字符算2个宽度
-                    cell_length = 0
-                    for char in str(cell.value):
-                        if '\u4e00' <= char <= '\u9fff':
-                            cell_length += 2
-                        else:
-                            cell_length += 1
-                    max_length = max(max_length, cell_length)
-            except:
-                pass
-        # 设置列宽，最大50
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
+    for row in iter_rows(cols):
+        ws.append(row)
 
     wb.save(filename)
 
 
-def save_to_markdown(df, filename):
-    """保存到 Markdown 文件"""
+def markdown_cell(value):
+    """转义单元格内容：换行替换为空格，竖线转义，避免破坏表格结构"""
+    return str(value).replace("\r\n", " ").replace("\n", " ").replace("|", "\\|")
+
+
+def save_to_markdown(cols, filename):
+    """保存到 Markdown 文件（逐行写入，不在内存中拼接整张表）"""
     with open(filename, 'w', encoding='utf-8') as f:
         f.write("# Claude Code 交互分析表\n\n")
-        # 使用 tabulate 格式化表格
-        markdown_table = df.to_markdown(index=False)
-        f.write(markdown_table)
-        f.write("\n")
+        f.write("| " + " | ".join(markdown_cell(c) for c in COLUMNS) + " |\n")
+        f.write("|" + "|".join("---" for _ in COLUMNS) + "|\n")
+        for row in iter_rows(cols):
+            f.write("| " + " | ".join(markdown_cell(c) for c in row) + " |\n")
 
 
 def main():
     # 读取 JSON 文件
     input_file = "merged.json"
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # 处理数据
-    rows = process_data(data)
-
-    # 创建 DataFrame
-    columns = ["step", "turn_index", "role", "user_text", "assistant_text",
-               "thinking", "tool_count", "tool_names", "raw_tool_json"]
-    df = pd.DataFrame(rows, columns=columns)
+    with open(input_file, 'rb') as f:
+        data = json_loads(f.read())
 
-    # 将空字符串保持为空字符串，避免显示为 NaN
-    df = df.fillna("")
+    # 处理数据（空值已在 process_data 中处理为空字符串）
+    cols = process_data(data)
 
     # 保存到 Excel
     excel_file = "analysis.xlsx"
-    save_to_excel(df, excel_file)
+    save_to_excel(cols, excel_file)
     print(f"Excel 文件已生成: {excel_file}")
 
     # 保存到 Markdown
     md_file = "analysis.md"
-    save_to_markdown(df, md_file)
+    save_to_markdown(cols, md_file)
     print(f"Markdown 文件已生成: {md_file}")
 
     # 打印统计信息
     print(f"\n统计信息:")
     print(f"  总步骤数: {len(data)}")
-    print(f"  总交互数: {len(df)}")
-    print(f"  总工具调用数: {df['tool_count'].sum()}")
+    print(f"  总交互数: {len(cols['step'])}")
+    print(f"  总工具调用数: {sum(cols['tool_count'])}")
 
 
 if __name__ == "__main__":
@@ -7,27 +7,91 @@ and consolidates text_delta, thinking_delta, and input_json_delta into
 complete entries, then writes to a JSON file with the same name.
 """
 
+import functools
 import json
+import mmap
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any
 
+try:
+    import orjson
+except ImportError:  # fall back to stdlib json
+    orjson = None
 
-def natural_sort_key(text: str) -> List:
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialise obj to UTF-8 JSON bytes, using orjson when available.
+
+    Args:
+        obj: Object to serialise
+        indent: Pretty-print with 2-space indentation
+
+    Returns:
+        UTF-8 encoded JSON (non-ASCII characters are kept as-is)
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    # Match orjson's output byte for byte: compact separators unless indenting
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_bytes(path, data: bytes) -> None:
+    """Write data to path with raw os.write calls (no buffered file object).
+
+    Used for the many small per-request JSON files, where each output is a
+    single pre-serialised buffer.
+
+    Args:
+        path: Destination file path (created or truncated)
+        data: Bytes to write
+    """
+    # O_BINARY (Windows only) keeps the fd out of text mode, like open(path, "wb")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+_NATURAL_SORT_RE = re.compile(r'(\d+)')
+
+
+@functools.lru_cache(maxsize=8192)
+def _natural_sort_key(text: str) -> tuple:
+    return tuple(int(c) if c.isdigit() else c.lower() for c in _NATURAL_SORT_RE.split(text))
+
+
+def natural_sort_key(text: str) -> tuple:
     """Generate a key for natural sorting (e.g., req1, req2, ..., req10, req11).
 
     Args:
-        text: String to generate sorting key for
+        text: String (or Path, sorted by its name) to generate sorting key for
 
     Returns:
-        List with string and numeric parts for proper sorting
+        Tuple with string and numeric parts for proper sorting
     """
-    # Convert to string if Path object
+    # Convert to string if Path object, so the cache is keyed by name
     if isinstance(text, Path):
         text = text.name
 
-    return [int(c) if c.isdigit() else c.lower() for c in re.split(r'(\d+)', text)]
+    return _natural_sort_key(text)
 
 
 def parse_delta_line(line: str) -> Dict[str, Any]:
@@ -45,7 +109,7 @@ def parse_delta_line(line: str) -> Dict[str, Any]:
 
     json_str = line[6:]  # Remove "data: " prefix
     try:
-        data = json.loads(json_str)
+        data = json_loads(json_str)
         return data
     except json.JSONDecodeError:
         return None
@@ -60,51 +124,40 @@ def consolidate_deltas(parsed_entries: List[Dict]) -> List[Dict[str, Any]]:
     Returns:
         List of consolidated entries with type, content/delta fields
     """
-    # Group by (delta_type, index)
-    groups: Dict[tuple, List[Dict]] = {}
+    # Group by (delta_type, index). Text/thinking groups keep only the string
+    # fragments so they can be joined in one go; tool_use groups keep deltas.
+    groups: Dict[tuple, List] = {}
 
     for entry in parsed_entries:
         delta = entry.get("delta", {})
         delta_type = delta.get("type")
-        index = entry.get("index", 0)
 
-        if delta_type is None:
+        if delta_type == "text_delta":
+            value = delta.get("text", "")
+        elif delta_type == "thinking_delta":
+            value = delta.get("thinking", "")
+        elif delta_type == "input_json_delta":
+            value = delta
+        else:
             continue
 
-        key = (delta_type, index)
-        if key not in groups:
-            groups[key] = []
-        groups[key].append(delta)
+        groups.setdefault((delta_type, entry.get("index", 0)), []).append(value)
 
     result = []
 
-    # Process text_delta - consolidate text content
-    for (delta_type, index), deltas in sorted(groups.items(),reverse=True):
-        if delta_type == "text_delta":
-            content = ""
-            for delta in deltas:
-                content += delta.get("text", "")
-            result.append({
-                "type": "text",
-                "content": content
-            })
-
-        elif delta_type == "thinking_delta":
-            content = ""
-            for delta in deltas:
-                content += delta.get("thinking", "")
-            result.append({
-                "type": "thinking",
-                "content": content
-            })
-
-        elif delta_type == "input_json_delta":
+    for (delta_type, index), parts in sorted(groups.items(), reverse=True):
+        if delta_type == "input_json_delta":
             # For input_json_delta, include the full delta structure
-            for delta in deltas:
+            for delta in parts:
                 result.append({
                     "type": "tool_use",
                     "delta": delta
                 })
+        else:
+            result.append({
+                "type": "text" if delta_type == "text_delta" else "thinking",
+                "content": "".join(parts)
+            })
 
     return result
 
@@ -113,7 +166,32 @@ import os
 import re
 
 
-def extract_sse_to_json(txt_path):
+# Files at least this large are memory-mapped instead of read through a buffer
+MMAP_THRESHOLD = 64 * 1024
+
+
+def iter_file_lines(path):
+    """Yield the raw lines (bytes, newline included) of a file.
+
+    Large files are memory-mapped so lines are sliced straight out of the
+    page cache; small files use a plain binary read.
+
+    Args:
+        path: Path to the file
+
+    Yields:
+        Each line of the file as bytes
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            yield from f
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter(mm.readline, b"")
+
+
+def extract_sse_to_json(txt_path, write=False):
     """
     从 mitmproxy 导出的 txt 中提取：
     - messages
@@ -121,12 +199,9 @@ def extract_sse_to_json(txt_path):
     - text
     - tool_use
 
-    并保存为同名 json 文件
+    write 为 True 时同时保存为同名 json 文件，否则只返回解析结果
     """
 
-    with open(txt_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
     result = {
         "message": [],
         "thinking": "",
@@ -134,92 +209,84 @@ def extract_sse_to_json(txt_path):
         "tool_use": []
     }
 
-    # -------------------------
-    # 1. 提取 messages（请求体）
-    # -------------------------
-    def extract_messages_from_text(content):
-        """
-        从 txt 中提取第一段合法 JSON，并返回其中的 messages
-        """
-        for line in content.splitlines():
-            line = line.strip()
-
-            # 跳过空行或明显不是 JSON 的行
-            if not line.startswith("{"):
-                continue
-
-            try:
-                obj = json.loads(line)
-                if "messages" in obj and "model" in obj:
-                    return obj["messages"]
-            except Exception:
-                continue
-
-        return []
-    # -------------------------
-    # 2. 提取 SSE event 数据
-    # -------------------------
+    messages = None
     thinking_parts = []
     text_parts = []
     tool_uses = []
 
-    for line in content.splitlines():
+    # 逐行流式读取（大文件使用 mmap），一次遍历同时提取 messages（请求体）与 SSE event 数据
+    for line in iter_file_lines(txt_path):
         line = line.strip()
 
-        if not line.startswith("data:"):
-            continue
+        # -------------------------
+        # 1. 提取 SSE event 数据
+        # -------------------------
+        if line.startswith(b"data:"):
+            try:
+                data = json_loads(line[5:])
+            except Exception:
+                continue
 
-        try:
-            data = json.loads(line[5:].strip())
-        except Exception:
-            continue
+            if data.get("type") != "content_block_delta":
+                continue
 
-        # thinking delta
-        if data.get("type") == "content_block_delta":
             delta = data.get("delta", {})
-            if delta.get("type") == "thinking_delta":
+            delta_type = delta.get("type")
+            if delta_type == "thinking_delta":
                 thinking_parts.append(delta.get("thinking", ""))
-
-            if delta.get("type") == "text_delta":
+            elif delta_type == "text_delta":
                 text_parts.append(delta.get("text", ""))
-
-            if delta.get("type") == "input_json_delta":
+            elif delta_type == "input_json_delta":
                 try:
-                    tool_json = json.loads(delta.get("partial_json", "{}"))
+                    tool_json = json_loads(delta.get("partial_json", "{}"))
                     tool_uses.append(tool_json)
                 except Exception:
                     pass
 
+        # -------------------------
+        # 2. 提取 messages（第一段包含 messages/model 的合法 JSON）
+        # mitmproxy 导出中请求体就是第一行 JSON；先做字节级预筛选，
+        # 不含 messages/model 字段的行直接跳过，不尝试解析
+        # -------------------------
+        elif (messages is None and line.startswith(b"{")
+              and b'"messages"' in line and b'"model"' in line):
+            try:
+                obj = json_loads(line)
+                if "messages" in obj and "model" in obj:
+                    messages = obj["messages"]
+            except Exception:
+                continue
+
     result["thinking"] = "".join(thinking_parts)
     result["text"] = "".join(text_parts)
     result["tool_use"] = tool_uses
-    result['message'] = extract_messages_from_text(content)
+    result["message"] = messages if messages is not None else []
 
     # -------------------------
-    # 3. 写入同名 json 文件
+    # 3. 写入同名 json 文件（可选）
     # -------------------------
-    json_path = os.path.splitext(txt_path)[0] + ".json"
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    if write:
+        json_path = os.path.splitext(txt_path)[0] + ".json"
+        write_bytes(json_path, json_dumps(result))
 
     return result
 
-def process_txt_file(txt_path: Path) -> bool:
+def process_txt_file(txt_path: Path, indent: bool = False) -> bool:
     """Process a single txt file and generate corresponding JSON.
 
     Args:
         txt_path: Path to the txt file
+        indent: Pretty-print the JSON; output is compact by default
 
     Returns:
         True if successful, False otherwise
     """
     content = extract_sse_to_json(txt_path)
 
-    # Write to JSON file with same name
+    # Write to JSON file with same name (single write)
     json_path = txt_path.with_suffix(".json")
     try:
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(content, f, ensure_ascii=False, indent=2)
+        write_bytes(json_path, json_dumps(content, indent=indent))
         print(f"Created: {json_path}")
         return True
     except Exception as e:
@@ -227,11 +294,33 @@ def process_txt_file(txt_path: Path) -> bool:
         return False
 
 
-def process_directory(base_dir: Path) -> Dict[str, int]:
+def make_executor(max_workers: int = None):
+    """Create a process pool, falling back to threads where processes are unavailable.
+
+    Args:
+        max_workers: Number of workers (default: os.cpu_count())
+
+    Returns:
+        A concurrent.futures executor
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    try:
+        return ProcessPoolExecutor(max_workers=max_workers)
+    except (NotImplementedError, OSError):
+        # e.g. platforms without working multiprocessing primitives
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def process_directory(base_dir: Path, max_workers: int = None) -> Dict[str, int]:
     """Process all txt files in subdirectories of base_dir.
 
+    Files are independent of each other, so they are converted in parallel
+    with a process pool (falling back to threads where processes are not
+    available).
+
     Args:
         base_dir: Base directory containing subdirectories with txt files
+        max_workers: Number of workers (default: os.cpu_count())
 
     Returns:
         Statistics dict with success, failure, skip counts
@@ -241,24 +330,52 @@ def process_directory(base_dir: Path) -> Dict[str, int]:
     # Get all subdirectories (步骤1, 步骤2, etc.)
     subdirs = [d for d in base_dir.iterdir() if d.is_dir()]
 
+    all_txt_files = []
     for subdir in subdirs:
-        print(f"\nProcessing {subdir.name}/")
         txt_files = list(subdir.glob("*.txt"))
 
         # Sort using natural sort for proper req1, req2, ..., req10 ordering
         txt_files.sort(key=natural_sort_key)
+        print(f"Found {len(txt_files)} txt files in {subdir.name}/")
+        all_txt_files.extend(txt_files)
 
-        for txt_file in txt_files:
+    if not all_txt_files:
+        return stats
 
-            if process_txt_file(txt_file):
-                stats["success"] += 1
-            else:
-                stats["failure"] += 1
+    with make_executor(max_workers) as executor:
+        results = list(executor.map(process_txt_file, all_txt_files, chunksize=8))
+
+    for ok in results:
+        if ok:
+            stats["success"] += 1
+        else:
+            stats["failure"] += 1
 
     return stats
 
 
-def merge_folder_jsons(base_dir: Path, output_filename: str = "merged.json") -> bool:
+# Concurrent reads used by merge_folder_jsons (bounded to avoid FD exhaustion)
+MERGE_READ_WORKERS = 64
+
+
+def read_json_file(json_path: Path):
+    """Read and parse a single JSON file.
+
+    Args:
+        json_path: Path to the JSON file
+
+    Returns:
+        Tuple of (parsed data, None) on success or (None, exception) on failure
+    """
+    try:
+        with open(json_path, "rb") as f:
+            return json_loads(f.read()), None
+    except Exception as e:
+        return None, e
+
+
+def merge_folder_jsons(base_dir: Path, output_filename: str = "merged.json",
+                       pretty: bool = False) -> bool:
     """Read all JSON files in each subfolder and merge into a single list.
 
     Traverses each folder under base_dir, reads all JSON files in each folder,
@@ -267,6 +384,7 @@ def merge_folder_jsons(base_dir: Path, output_filename: str = "merged.json") ->
     Args:
         base_dir: Base directory containing subdirectories with JSON files
         output_filename: Name of the output JSON file (default: "merged.json")
+        pretty: Write indented JSON (default: compact)
 
     Returns:
         True if successful, False otherwise
@@ -276,36 +394,73 @@ def merge_folder_jsons(base_dir: Path, output_filename: str = "merged.json") ->
     # Get all subdirectories (步骤1, 步骤2, etc.)
     subdirs = [d for d in base_dir.iterdir() if d.is_dir()]
 
+    folders = []
     for subdir in sorted(subdirs, key=natural_sort_key):
         if "步骤" not in subdir.name:
             continue
-        print(f"\nProcessing {subdir.name}/")
         json_files = list(subdir.glob("*.json"))
-        merged_data_sub = []
 
         # Sort using natural sort for proper req1, req2, ..., req10 ordering
         json_files.sort(key=natural_sort_key)
-        user_input = str(subdir).split("/")[-1]  # Fallback to folder name if user.txt not found
-        for json_file in json_files:
-            try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        merged_data_sub.append(data)
-                    else:
-                        # If single object, wrap in list
-                        merged_data_sub.append(data)
+        folders.append((subdir, json_files))
+
+    with ThreadPoolExecutor(max_workers=MERGE_READ_WORKERS) as executor:
+        # Submit every read up front so file I/O overlaps across all folders;
+        # results are still consumed in sorted order
+        pending = [(subdir, json_files, executor.map(read_json_file, json_files))
+                   for subdir, json_files in folders]
+
+        for subdir, json_files, results in pending:
+            print(f"\nProcessing {subdir.name}/")
+            merged_data_sub = []
+            user_input = str(subdir).split("/")[-1]  # Fallback to folder name if user.txt not found
+            for json_file, (data, error) in zip(json_files, results):
+                if error is not None:
+                    print(f"  Error reading {json_file.name}: {error}")
+                    continue
+                if isinstance(data, list):
+                    merged_data_sub.append(data)
+                else:
+                    # If single object, wrap in list
+                    merged_data_sub.append(data)
                 print(f"  Read: {json_file.name} ({len(data) if isinstance(data, list) else 1} entries)")
-            except Exception as e:
-                print(f"  Error reading {json_file.name}: {e}")
-                continue
-        merged_data[user_input] = merged_data_sub
+            merged_data[user_input] = merged_data_sub
 
     # Write merged data to output file
-    output_path = base_dir / output_filename
+    return write_merged(base_dir / output_filename, merged_data, pretty=pretty)
+
+
+def write_merged(output_path: Path, merged_data: Dict[str, List], pretty: bool = False) -> bool:
+    """Write the merged {step folder: [entries]} data to output_path.
+
+    The compact form is streamed entry by entry, so the whole document is
+    never serialised into one buffer.
+
+    Args:
+        output_path: Path of the merged JSON file
+        merged_data: Mapping of step folder name to its list of entries
+        pretty: Write indented JSON instead of the compact streamed form
+
+    Returns:
+        True if successful, False otherwise
+    """
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(merged_data, f, ensure_ascii=False, indent=2)
+        with open(output_path, "wb") as f:
+            if pretty:
+                f.write(json_dumps(merged_data, indent=True))
+            else:
+                f.write(b"{")
+                for i, (key, entries) in enumerate(merged_data.items()):
+                    if i:
+                        f.write(b",")
+                    f.write(json_dumps(key))
+                    f.write(b":[")
+                    for j, entry in enumerate(entries):
+                        if j:
+                            f.write(b",")
+                        f.write(json_dumps(entry))
+                    f.write(b"]")
+                f.write(b"}")
         print(f"\n" + "=" * 50)
         print(f"Created merged file: {output_path}")
         print(f"Total entries: {len(merged_data)}")
@@ -316,7 +471,78 @@ def merge_folder_jsons(base_dir: Path, output_filename: str = "merged.json") ->
         return False
 
 
-def aggregate_tools(base_dir: Path, output_file: str = "tools.json") -> List[Dict[str, Any]]:
+def try_extract_sse_to_json(txt_path, write=False):
+    """Run extract_sse_to_json, capturing any error instead of raising.
+
+    Args:
+        txt_path: Path to the txt file
+        write: Also write the same-name JSON file
+
+    Returns:
+        Tuple of (result, None) on success or (None, exception) on failure
+    """
+    try:
+        return extract_sse_to_json(txt_path, write=write), None
+    except Exception as e:
+        return None, e
+
+
+def run_all(base_dir: Path, output_filename: str = "merged.json", max_workers: int = None,
+            pretty: bool = False) -> bool:
+    """Convert txt files to JSON and merge them in a single run.
+
+    Equivalent to operation 1 followed by operation 2, except that the parsed
+    results are kept in memory and merged directly instead of being read back
+    from the per-request JSON files. A capture that fails to convert is
+    reported and left out of the merge; it does not abort the run.
+
+    Args:
+        base_dir: Base directory containing '步骤*' folders with txt files
+        output_filename: Name of the output JSON file (default: "merged.json")
+        max_workers: Number of workers (default: os.cpu_count())
+        pretty: Write indented JSON (default: compact)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    # Get all subdirectories (步骤1, 步骤2, etc.)
+    subdirs = [d for d in base_dir.iterdir() if d.is_dir() and "步骤" in d.name]
+    subdirs.sort(key=natural_sort_key)
+
+    folder_files = []
+    for subdir in subdirs:
+        txt_files = list(subdir.glob("*.txt"))
+
+        # Sort using natural sort for proper req1, req2, ..., req10 ordering
+        txt_files.sort(key=natural_sort_key)
+        folder_files.append((subdir.name, txt_files))
+
+    all_txt_files = [p for _, txt_files in folder_files for p in txt_files]
+    results = []
+    if all_txt_files:
+        # Parse and write each reqN.json in the workers, keep the results for merging
+        with make_executor(max_workers) as executor:
+            results = list(executor.map(functools.partial(try_extract_sse_to_json, write=True),
+                                        all_txt_files, chunksize=8))
+
+    merged_data = {}
+    offset = 0
+    for folder_name, txt_files in folder_files:
+        merged_data_sub = []
+        for txt_file, (result, error) in zip(txt_files, results[offset:offset + len(txt_files)]):
+            if error is not None:
+                print(f"  Error converting {txt_file.name}: {error}")
+                continue
+            merged_data_sub.append(result)
+        merged_data[folder_name] = merged_data_sub
+        offset += len(txt_files)
+        print(f"Converted {len(merged_data_sub)}/{len(txt_files)} txt files in {folder_name}/")
+
+    return write_merged(base_dir / output_filename, merged_data, pretty=pretty)
+
+
+def aggregate_tools(base_dir: Path, output_file: str = "tools.json",
+                    verbose: bool = False) -> List[Dict[str, Any]]:
     """Traverse folders starting with '步骤', read req*.txt files, and aggregate tools.
 
     Reads all txt files starting with 'req' in folders starting with '步骤',
@@ -326,11 +552,13 @@ def aggregate_tools(base_dir: Path, output_file: str = "tools.json") -> List[Dic
     Args:
         base_dir: Base directory containing '步骤*' folders
         output_file: Output filename for the aggregated tools (default: "tools.json")
+        verbose: Log every added/skipped tool instead of only the summary
 
     Returns:
         List of unique tool dictionaries
     """
-    tools_dict = {}  # Use dict for deduplication by tool name
+    seen_names = set()  # Tool names already collected, for deduplication
+    unique_tools = []
 
     # Get all folders starting with '步骤'
     step_folders = [d for d in base_dir.iterdir() if d.is_dir() and d.name.startswith("步骤")]
@@ -348,40 +576,45 @@ def aggregate_tools(base_dir: Path, output_file: str = "tools.json") -> List[Dic
         for req_file in req_files:
             print(f"  Reading: {req_file.name}")
             try:
-                with open(req_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        # Try to parse as JSON
-                        try:
-                            data = json.loads(line)
-
-                            # Check if this is a valid request with model, messages, tools
-                            if isinstance(data, dict) and "model" in data and "messages" in data:
-                                tools = data.get("tools", [])
-                                if isinstance(tools, list):
-                                    for tool in tools:
-                                        if isinstance(tool, dict) and "name" in tool:
-                                            tool_name = tool["name"]
-                                            # Deduplicate by tool name
-                                            if tool_name not in tools_dict:
-                                                tools_dict[tool_name] = tool
+                for line in iter_file_lines(req_file):
+                    line = line.strip()
+
+                    # Cheap prefilter: only request bodies can contribute tools,
+                    # so skip SSE/header lines without attempting a parse
+                    if not (line.startswith(b"{") and b'"tools"' in line and b'"messages"' in line):
+                        continue
+
+                    # Try to parse as JSON
+                    try:
+                        data = json_loads(line)
+
+                        # Check if this is a valid request with model, messages, tools
+                        if isinstance(data, dict) and "model" in data and "messages" in data:
+                            tools = data.get("tools", [])
+                            if isinstance(tools, list):
+                                for tool in tools:
+                                    if isinstance(tool, dict) and "name" in tool:
+                                        tool_name = tool["name"]
+                                        # Deduplicate by tool name
+                                        if tool_name not in seen_names:
+                                            seen_names.add(tool_name)
+                                            unique_tools.append(tool)
+                                            if verbose:
                                                 print(f"    Added tool: {tool_name}")
-                                            else:
-                                                print(f"    Skipped duplicate tool: {tool_name}")
-                        except json.JSONDecodeError:
-                            # Skip lines that are not valid JSON
-                            continue
+                                        elif verbose:
+                                            print(f"    Skipped duplicate tool: {tool_name}")
+
+                            # Each capture holds a single request body, so the
+                            # remaining (SSE response) lines can be skipped
+                            break
+                    except json.JSONDecodeError:
+                        # Skip lines that are not valid JSON
+                        continue
 
             except Exception as e:
                 print(f"  Error reading {req_file.name}: {e}")
                 continue
 
-    # Convert dict values to list
-    unique_tools = list(tools_dict.values())
-
     # Sort by tool name for consistent output
     unique_tools.sort(key=lambda t: t.get("name", ""))
 
@@ -392,8 +625,8 @@ def aggregate_tools(base_dir: Path, output_file: str = "tools.json") -> List[Dic
     # Write to tools.json
     output_path = base_dir / output_file
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(unique_tools, f, ensure_ascii=False, indent=2)
+        with open(output_path, "wb") as f:
+            f.write(json_dumps(unique_tools, indent=True))
         print(f"\nCreated: {output_path}")
     except Exception as e:
         print(f"Error writing {output_path}: {e}")
@@ -406,13 +639,17 @@ def main():
     script_dir = Path(__file__).parent
     base_dir = script_dir
 
+    # merged.json is compact by default; pass --pretty for indented output
+    pretty = "--pretty" in sys.argv[1:]
+
     print("Available operations:")
     print("1. Convert txt files to JSON")
     print("2. Merge all JSON files in subfolders")
     print("3. Aggregate tools from req*.txt files")
+    print("4. Convert txt files and merge (1 + 2 in one pass)")
     print("=" * 50)
 
-    choice = input("Select operation (1/2/3): ").strip()
+    choice = input("Select operation (1/2/3/4): ").strip()
 
     if choice == "1":
         print(f"\nProcessing txt files in: {base_dir}")
@@ -437,7 +674,7 @@ def main():
         if not output_name.endswith(".json"):
             output_name += ".json"
 
-        merge_folder_jsons(base_dir, output_name)
+        merge_folder_jsons(base_dir, output_name, pretty=pretty)
 
     elif choice == "3":
         print(f"\nAggregating tools from: {base_dir}")
@@ -452,6 +689,19 @@ def main():
 
         aggregate_tools(base_dir, output_file=output_name)
 
+    elif choice == "4":
+        print(f"\nConverting and merging txt files in: {base_dir}")
+        print("=" * 50)
+
+        output_name = input("Output filename (default: merged.json): ").strip()
+        if not output_name:
+            output_name = "merged.json"
+
+        if not output_name.endswith(".json"):
+            output_name += ".json"
+
+        run_all(base_dir, output_name, pretty=pretty)
+
     else:
         print("Invalid choice.")
 